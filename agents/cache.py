@@ -0,0 +1,92 @@
+# agents/cache.py
+"""
+TTL caches for Hunter and Apollo lookups.
+
+Domain searches, org enrichment and email verification change slowly, so
+parsed responses are kept in memory for a day (Hunter) or a week (Apollo).
+With PERSISTENT_CACHE=true entries are also written to the Supabase
+`cache_kv` table (sql/cache_kv.sql) so they survive restarts and deploys.
+"""
+import asyncio
+import functools
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+
+from cachetools import TTLCache
+from loguru import logger
+
+from config import settings
+
+hunter_cache: TTLCache = TTLCache(maxsize=10_000, ttl=86_400)
+apollo_cache: TTLCache = TTLCache(maxsize=10_000, ttl=7 * 86_400)
+
+stats = {"hits": 0, "misses": 0}
+
+def _kv_table():
+    from db import get_supabase
+    return get_supabase().table("cache_kv")
+
+
+def _kv_get(key: str) -> Optional[Any]:
+    now = datetime.now(timezone.utc).isoformat()
+    rows = (
+        _kv_table().select("value").eq("key", key).gt("expires_at", now).limit(1).execute().data
+    )
+    return rows[0]["value"] if rows else None
+
+
+def _kv_set(key: str, value: Any, ttl: float) -> None:
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+    _kv_table().upsert({"key": key, "value": value, "expires_at": expires_at.isoformat()}).execute()
+
+
+def _record(hit: bool, key: str) -> None:
+    stats["hits" if hit else "misses"] += 1
+    logger.debug(
+        f"Cache {'hit' if hit else 'miss'} | {key} | hits={stats['hits']} misses={stats['misses']}"
+    )
+
+
+def cached_json(cache: TTLCache, key: Callable[..., str], namespace: str):
+    """Cache the JSON-serialisable result of an async method.
+
+    `key` receives the method's arguments (including self) and returns the
+    lookup key. None results are never cached so failed calls are retried
+    on the next run.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_key = f"{namespace}:{key(*args, **kwargs)}"
+
+            value = cache.get(cache_key)
+            if value is not None:
+                _record(True, cache_key)
+                return value
+
+            if settings.persistent_cache:
+                try:
+                    value = await asyncio.to_thread(_kv_get, cache_key)
+                except Exception as e:
+                    logger.warning(f"Cache read failed for {cache_key}: {e}")
+                if value is not None:
+                    cache[cache_key] = value
+                    _record(True, cache_key)
+                    return value
+
+            _record(False, cache_key)
+            value = await func(*args, **kwargs)
+            if value is None:
+                return value
+
+            cache[cache_key] = value
+            if settings.persistent_cache:
+                try:
+                    await asyncio.to_thread(_kv_set, cache_key, value, cache.ttl)
+                except Exception as e:
+                    logger.warning(f"Cache write failed for {cache_key}: {e}")
+            return value
+
+        return wrapper
+
+    return decorator
@@ -1,14 +1,19 @@
 # agents/discovery/discovery_agent.py
-import httpx
+import asyncio
+import orjson
 from pydantic import BaseModel
 from loguru import logger
-from tenacity import retry, stop_after_attempt, wait_exponential
-from typing import Optional
-import sys, os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from typing import Any, Optional
 
 from config import settings
 from icp_config import icp
+from agents.cache import cached_json, hunter_cache
+from agents.http_client import (
+    SharedClientMixin,
+    api_retry,
+    check_rate_limit,
+    throttle,
+)
 
 
 class DiscoveredLead(BaseModel):
@@ -21,15 +26,16 @@ class DiscoveredLead(BaseModel):
     data_source: str = "hunter"
 
 
-class DiscoveryAgent:
+class DiscoveryAgent(SharedClientMixin):
     BASE_URL = "https://api.hunter.io/v2"
 
     def __init__(self) -> None:
         self.api_key = settings.hunter_api_key
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=2, max=10))
-    def search_domain(self, domain: str) -> list[DiscoveredLead]:
-        """Search Hunter.io for decision-makers at a given company domain."""
+    @cached_json(hunter_cache, key=lambda self, domain: domain.lower(), namespace="hunter:domain")
+    @api_retry
+    async def _domain_search(self, domain: str) -> dict[str, Any]:
+        """Fetch the raw Hunter.io domain-search payload for a domain."""
         url = f"{self.BASE_URL}/domain-search"
         params = {
             "domain": domain,
@@ -40,26 +46,26 @@ class DiscoveryAgent:
 
         logger.info(f"Searching Hunter.io | domain={domain}")
 
-        with httpx.Client(timeout=30) as client:
-            response = client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+        async with throttle("hunter"):
+            response = await self.client.get(url, params=params)
+        await check_rate_limit(response)
+        response.raise_for_status()
+        return orjson.loads(response.content)
 
-        emails = data.get("data", {}).get("emails", [])
-        company_name = data.get("data", {}).get("organization")
+    async def search_domain(self, domain: str) -> list[DiscoveredLead]:
+        """Search Hunter.io for decision-makers at a given company domain."""
+        payload = await self._domain_search(domain)
+        data = payload.get("data") or {}
+        emails = data.get("emails", [])
+        company_name = data.get("organization")
         logger.info(f"Hunter returned {len(emails)} contacts for {domain}")
 
-        for e in emails:
-            print(f"  RAW TITLE: '{e.get('position')}'")
-
         results = []
         for e in emails:
             # Filter for decision-maker titles only
             title = e.get("position") or ""
-            is_decision_maker = any(
-                t.lower() in title.lower() for t in icp.target_titles
-            ) if title else False
-            if not is_decision_maker:
+            title_l = title.lower()
+            if not (title_l and (title_l in icp.titles_set or icp.titles_re.search(title_l))):
                 continue
 
             try:
@@ -78,13 +84,19 @@ class DiscoveryAgent:
 
         return results
 
-    def search_multiple_domains(self, domains: list[str]) -> list[DiscoveredLead]:
-        """Search multiple domains and aggregate results."""
+    async def search_multiple_domains(self, domains: list[str]) -> list[DiscoveredLead]:
+        """Search multiple domains concurrently and aggregate results."""
+        results = await asyncio.gather(
+            *(self.search_domain(domain) for domain in domains),
+            return_exceptions=True,
+        )
         all_leads = []
-        for domain in domains:
-            leads = self.search_domain(domain)
+        for domain, leads in zip(domains, results):
+            if isinstance(leads, Exception):
+                logger.error(f"Failed to search {domain}: {leads}")
+                continue
             all_leads.extend(leads)
-            logger.info(f"Running total: {len(all_leads)} leads")
+        logger.info(f"Running total: {len(all_leads)} leads")
         return all_leads
 
 
@@ -97,7 +109,7 @@ if __name__ == "__main__":
     ]
 
     agent = DiscoveryAgent()
-    leads = agent.search_multiple_domains(test_domains)
+    leads = asyncio.run(agent.search_multiple_domains(test_domains))
 
     print(f"\nDiscovered {len(leads)} decision-maker leads:\n")
     for lead in leads:
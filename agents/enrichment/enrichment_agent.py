@@ -7,27 +7,23 @@ Step 5 (Enrichment)
 Apollo Org Enrichment → domain IN → industry, funding, tech stack OUT
 Hunter Email Verifier → email IN → verified: True/False OUT
 """
-import httpx
-from pydantic import BaseModel
+import asyncio
+import orjson
 from loguru import logger
-from tenacity import retry, stop_after_attempt, wait_exponential
 from typing import Optional
-import sys, os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from config import settings
 from agents.discovery.discovery_agent import DiscoveredLead
+from agents.cache import apollo_cache, cached_json, hunter_cache
+from agents.http_client import (
+    SharedClientMixin,
+    api_retry,
+    check_rate_limit,
+    throttle,
+)
 
 
-class EnrichedLead(BaseModel):
-    # Carry over from discovery
-    contact_name: str
-    contact_title: Optional[str] = None
-    contact_email: Optional[str] = None
-    contact_linkedin: Optional[str] = None
-    company_name: Optional[str] = None
-    company_domain: Optional[str] = None
-
+class EnrichedLead(DiscoveredLead):
     # Enriched fields
     industry: Optional[str] = None
     employee_count: Optional[int] = None
@@ -40,9 +36,10 @@ class EnrichedLead(BaseModel):
     data_source: str = "hunter+apollo"
 
 
-class EnrichmentAgent:
+class EnrichmentAgent(SharedClientMixin):
     APOLLO_URL = "https://api.apollo.io/api/v1"
     HUNTER_URL = "https://api.hunter.io/v2"
+    VERIFY_BATCH_SIZE = 50
 
     def __init__(self) -> None:
         self.apollo_headers = {
@@ -51,66 +48,122 @@ class EnrichmentAgent:
         }
         self.hunter_key = settings.hunter_api_key
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=2, max=10))
-    def enrich_company(self, domain: str) -> dict:
+    @cached_json(apollo_cache, key=lambda self, domain: domain.lower(), namespace="apollo:org")
+    @api_retry
+    async def enrich_company(self, domain: str) -> Optional[dict]:
         """Get company signals from Apollo Organization Enrichment."""
         url = f"{self.APOLLO_URL}/organizations/enrich"
         params = {"domain": domain}
 
-        with httpx.Client(timeout=30) as client:
-            response = client.get(url, headers=self.apollo_headers, params=params)
-            if response.status_code == 200:
-                return response.json().get("organization", {})
-            else:
-                logger.warning(f"Apollo enrichment failed for {domain}: {response.status_code}")
-                return {}
-
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=2, max=10))
-    def verify_email(self, email: str) -> bool:
-        """Verify email deliverability via Hunter."""
+        async with throttle("apollo"):
+            response = await self.client.get(url, headers=self.apollo_headers, params=params)
+        await check_rate_limit(response)
+        if response.status_code >= 500:
+            # Raise so api_retry retries it; other failures are logged below
+            response.raise_for_status()
+        if response.status_code == 200:
+            return orjson.loads(response.content).get("organization") or {}
+        else:
+            logger.warning(f"Apollo enrichment failed for {domain}: {response.status_code}")
+            return None
+
+    @cached_json(hunter_cache, key=lambda self, email: email.lower(), namespace="hunter:verify")
+    @api_retry
+    async def _email_status(self, email: str) -> Optional[str]:
+        """Return Hunter's verifier result for an email, or None if the check failed."""
         url = f"{self.HUNTER_URL}/email-verifier"
         params = {"email": email, "api_key": self.hunter_key}
 
-        with httpx.Client(timeout=30) as client:
-            response = client.get(url, params=params)
-            if response.status_code == 200:
-                result = response.json().get("data", {}).get("result")
-                return result in ("deliverable", "accept_all")
-            return False
+        async with throttle("hunter"):
+            response = await self.client.get(url, params=params)
+        await check_rate_limit(response)
+        if response.status_code >= 500:
+            response.raise_for_status()
+        if response.status_code == 200:
+            data = orjson.loads(response.content).get("data") or {}
+            return data.get("result")
+        return None
+
+    async def verify_email(self, email: str) -> bool:
+        """Verify email deliverability via Hunter."""
+        return await self._email_status(email) in ("deliverable", "accept_all")
+
+    async def verify_emails_bulk(self, emails: list[str]) -> dict[str, bool]:
+        """Verify a set of emails, deduplicated, in batches of VERIFY_BATCH_SIZE.
+
+        Hunter has no multi-address verifier endpoint, so each batch is fanned
+        out over the shared connection. Addresses whose check fails map to False.
+        """
+        unique = list(dict.fromkeys(emails))
+        verified: dict[str, bool] = {}
+        for start in range(0, len(unique), self.VERIFY_BATCH_SIZE):
+            batch = unique[start:start + self.VERIFY_BATCH_SIZE]
+            results = await asyncio.gather(
+                *(self.verify_email(email) for email in batch),
+                return_exceptions=True,
+            )
+            for email, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Email verification failed for {email}: {result}")
+                    result = False
+                verified[email] = result
+        return verified
+
+    def _build_lead(self, lead: DiscoveredLead, org: dict, email_verified: bool) -> EnrichedLead:
+        # Inputs are an already-validated DiscoveredLead plus Apollo data
+        return EnrichedLead.model_construct(
+            **lead.model_dump(exclude={"company_name", "data_source"}),
+            company_name=lead.company_name or org.get("name"),
+            industry=org.get("industry"),
+            employee_count=org.get("num_employees"),
+            headquarters=org.get("city") or org.get("country"),
+            funding_stage=org.get("latest_funding_stage"),
+            annual_revenue=org.get("annual_revenue_printed"),
+            technology_stack=(org.get("technology_names") or [])[:10],
+            email_verified=email_verified,
+        )
 
-    def enrich_lead(self, lead: DiscoveredLead) -> EnrichedLead:
+    async def enrich_lead(self, lead: DiscoveredLead) -> EnrichedLead:
         """Enrich a single lead with company signals and email verification."""
         logger.info(f"Enriching: {lead.contact_name} @ {lead.company_domain}")
 
         # Get company data
-        org = self.enrich_company(lead.company_domain) if lead.company_domain else {}
+        org = None
+        if lead.company_domain:
+            try:
+                org = await self.enrich_company(lead.company_domain)
+            except Exception as e:
+                logger.warning(f"Apollo lookup failed for {lead.company_domain}, continuing without company data: {e}")
 
         # Verify email
-        email_verified = self.verify_email(lead.contact_email) if lead.contact_email else False
+        email_verified = await self.verify_email(lead.contact_email) if lead.contact_email else False
 
-        return EnrichedLead(
-            contact_name=lead.contact_name,
-            contact_title=lead.contact_title,
-            contact_email=lead.contact_email,
-            contact_linkedin=lead.contact_linkedin,
-            company_name=lead.company_name or org.get("name"),
-            company_domain=lead.company_domain,
-            industry=org.get("industry"),
-            employee_count=org.get("num_employees"),
-            headquarters=org.get("city") or org.get("country"),
-            funding_stage=org.get("latest_funding_stage"),
-            annual_revenue=org.get("annual_revenue_printed"),
-            technology_stack=org.get("technology_names", [])[:10],
-            email_verified=email_verified,
+        return self._build_lead(lead, org or {}, email_verified)
+
+    async def enrich_all(self, leads: list[DiscoveredLead]) -> list[EnrichedLead]:
+        """Enrich a list of leads, looking up each company and email only once."""
+        domains = list(dict.fromkeys(l.company_domain for l in leads if l.company_domain))
+        emails = [l.contact_email for l in leads if l.contact_email]
+        logger.info(f"Enriching {len(leads)} leads across {len(domains)} companies")
+
+        org_results, verified = await asyncio.gather(
+            asyncio.gather(*(self.enrich_company(d) for d in domains), return_exceptions=True),
+            self.verify_emails_bulk(emails),
         )
 
-    def enrich_all(self, leads: list[DiscoveredLead]) -> list[EnrichedLead]:
-        """Enrich a list of leads."""
+        orgs = {}
+        for domain, org in zip(domains, org_results):
+            if isinstance(org, Exception):
+                # Keep the leads: qualification gives partial credit for missing org data
+                logger.warning(f"Apollo lookup failed for {domain}, continuing without company data: {org}")
+                org = None
+            orgs[domain] = org or {}
+
         enriched = []
         for lead in leads:
             try:
-                enriched_lead = self.enrich_lead(lead)
-                enriched.append(enriched_lead)
+                org = orgs.get(lead.company_domain, {})
+                enriched.append(self._build_lead(lead, org, verified.get(lead.contact_email, False)))
             except Exception as e:
                 logger.error(f"Failed to enrich {lead.contact_name}: {e}")
                 continue
@@ -121,13 +174,16 @@ class EnrichmentAgent:
 if __name__ == "__main__":
     from agents.discovery.discovery_agent import DiscoveryAgent
 
-    # Discover leads first
-    discovery = DiscoveryAgent()
-    leads = discovery.search_multiple_domains(["salesloft.com", "outreach.io"])
+    async def main():
+        # Discover leads first
+        discovery = DiscoveryAgent()
+        leads = await discovery.search_multiple_domains(["salesloft.com", "outreach.io"])
+
+        # Enrich them
+        enricher = EnrichmentAgent()
+        return await enricher.enrich_all(leads)
 
-    # Enrich them
-    enricher = EnrichmentAgent()
-    enriched = enricher.enrich_all(leads)
+    enriched = asyncio.run(main())
 
     print(f"\nEnriched {len(enriched)} leads:\n")
     for lead in enriched:
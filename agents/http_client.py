@@ -0,0 +1,160 @@
+# agents/http_client.py
+"""
+Shared async HTTP client and request throttling for the agents.
+
+One pooled HTTP/2 httpx.AsyncClient keeps connections to api.hunter.io and
+api.apollo.io alive between calls instead of paying a fresh TCP + TLS
+handshake on every request, and multiplexes concurrent requests to the same
+host over one connection. `throttle(api)` combines a per-API semaphore,
+capping how many requests the agents' asyncio.gather fan-out keeps in flight,
+with a token-bucket limiter that keeps the request rate under each
+provider's published limit so 429s stay the exception.
+
+The client, semaphores and limiters are bound to the event loop that uses
+them, so they are created lazily per running loop rather than at import
+time; repeated asyncio.run() calls each get their own set.
+
+`api_retry` is the shared tenacity policy: jittered exponential backoff,
+retrying transport errors, 5xx responses and 429s (after honouring
+Retry-After) but never other 4xx responses, which would only burn quota.
+"""
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+from aiolimiter import AsyncLimiter
+from loguru import logger
+from tenacity import (
+    retry,
+    retry_if_exception,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+# Upper bound on a server-supplied Retry-After delay
+MAX_RETRY_AFTER = 60.0
+
+# Requests in flight per API
+MAX_CONCURRENCY = {"hunter": 16, "apollo": 16, "openai": 20}
+
+# (requests, per seconds) per API
+RATE_LIMITS = {
+    "hunter": (15, 1),    # 15 requests / second
+    "apollo": (50, 60),   # 50 requests / minute
+    "openai": (500, 60),  # 500 requests / minute
+}
+
+_negotiated_hosts: set[str] = set()
+
+
+class _LoopState:
+    """HTTP client and throttles owned by a single event loop."""
+
+    def __init__(self) -> None:
+        self.client: Optional[httpx.AsyncClient] = None
+        self.semaphores = {api: asyncio.Semaphore(n) for api, n in MAX_CONCURRENCY.items()}
+        self.limiters = {api: AsyncLimiter(*rate) for api, rate in RATE_LIMITS.items()}
+
+
+_loop_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _loop_state() -> _LoopState:
+    loop = asyncio.get_running_loop()
+    state = _loop_states.get(loop)
+    if state is None:
+        state = _loop_states[loop] = _LoopState()
+    return state
+
+
+async def _log_http_version(response: httpx.Response) -> None:
+    """Log the negotiated protocol once per host to confirm HTTP/2 is in use."""
+    host = response.request.url.host
+    if host not in _negotiated_hosts:
+        _negotiated_hosts.add(host)
+        logger.info(f"{host} negotiated {response.http_version}")
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the running loop's shared AsyncClient, creating it on first use."""
+    state = _loop_state()
+    if state.client is None or state.client.is_closed:
+        # http2/limits live on the transport when a custom one is supplied
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=64,
+                max_connections=128,
+                keepalive_expiry=30.0,
+            ),
+            retries=1,
+        )
+        state.client = httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(connect=5, read=30, write=10, pool=5),
+            event_hooks={"response": [_log_http_version]},
+        )
+    return state.client
+
+
+@asynccontextmanager
+async def throttle(api: str) -> AsyncIterator[None]:
+    """Hold a concurrency slot and a rate-limit token for `api` ("hunter", "apollo", "openai")."""
+    state = _loop_state()
+    async with state.semaphores[api], state.limiters[api]:
+        yield
+
+
+class SharedClientMixin:
+    """Gives an agent a `client` attribute backed by the shared AsyncClient.
+
+    Looked up on each access, so a long-lived agent never holds a client
+    that close_client() has already closed.
+    """
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return get_client()
+
+
+class RateLimited(Exception):
+    """Raised on HTTP 429 so the request is retried by `api_retry`."""
+
+
+async def check_rate_limit(response: httpx.Response) -> None:
+    """Sleep for Retry-After and raise RateLimited if the response is a 429."""
+    if response.status_code != 429:
+        return
+    try:
+        delay = float(response.headers.get("Retry-After", 0))
+    except ValueError:
+        delay = 0.0
+    if delay > 0:
+        await asyncio.sleep(min(delay, MAX_RETRY_AFTER))
+    raise RateLimited(f"Rate limited by {response.request.url.host}")
+
+
+def _is_server_error(exc: BaseException) -> bool:
+    return isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code >= 500
+
+
+api_retry = retry(
+    stop=stop_after_attempt(5),
+    wait=wait_random_exponential(multiplier=1, max=30),
+    retry=retry_if_exception_type((httpx.TransportError, RateLimited))
+    | retry_if_exception(_is_server_error),
+    reraise=True,
+)
+
+
+async def close_client() -> None:
+    """Close the running loop's shared client (called on API shutdown)."""
+    state = _loop_states.get(asyncio.get_running_loop())
+    if state is not None and state.client is not None:
+        await state.client.aclose()
+        state.client = None
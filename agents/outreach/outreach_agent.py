@@ -1,13 +1,18 @@
 # agents/outreach/outreach_agent.py
-from openai import OpenAI
+import asyncio
+import re
+import orjson
+from openai import AsyncOpenAI
 from pydantic import BaseModel
 from loguru import logger
 from typing import Optional
-import sys, os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from config import settings
 from agents.qualification.qualification_agent import QualifiedLead
+from agents.http_client import throttle
+
+# Fallback for replies that ignore the JSON format and use SUBJECT:/BODY: lines
+_PARSE_RE = re.compile(r"SUBJECT:\s*(?P<subject>.+?)\s*\n\s*BODY:\s*(?P<body>.*)\Z", re.S)
 
 
 class OutreachResult(BaseModel):
@@ -22,106 +27,190 @@ class OutreachResult(BaseModel):
 
 
 class OutreachAgent:
+    MODEL = "gpt-4o-mini"
+    BATCH_ENDPOINT = "/v1/chat/completions"
+
+    # Invariant instructions go in the system message so every request shares
+    # the same prefix (eligible for OpenAI prompt caching)
+    SYSTEM_PROMPT = """You are an expert B2B sales copywriter who writes concise, personalized cold emails that get replies.
+
+OUR OFFER:
+We build AI-powered lead generation systems that deliver 400+ qualified leads per week, fully automated. We replace manual prospecting that typically costs sales teams 20-40 hours per week.
+
+EMAIL RULES:
+- Subject line: short, curiosity-driven, no clickbait
+- Opening: reference something specific about their company or role
+- Value prop: one clear sentence on what we do and the outcome
+- Social proof: mention "sales teams at Series B-G companies"
+- CTA: ask for a 20-minute call, keep it low pressure
+- Tone: confident, peer-to-peer, not salesy
+- Length: 5-7 sentences max, no fluff
+- No em-dashes
+
+Respond with a JSON object in this exact format:
+{"subject": "<subject line here>", "body": "<email body here>"}"""
+
+    _PROMPT_TMPL = """Write a personalized cold outreach email for the following lead.
+
+LEAD INFORMATION:
+- Name: {name}
+- Title: {title}
+- Company: {company}
+- Industry: {industry}
+- Funding Stage: {funding}
+- ICP Score: {score}/100"""
 
     def __init__(self) -> None:
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
 
     def _build_prompt(self, lead: QualifiedLead) -> str:
-        return f"""You are an expert B2B sales copywriter. Write a personalized cold outreach email for the following lead.
-
-            LEAD INFORMATION:
-            - Name: {lead.contact_name}
-            - Title: {lead.contact_title}
-            - Company: {lead.company_name}
-            - Industry: {lead.industry or 'B2B SaaS'}
-            - Funding Stage: {lead.funding_stage or 'Growth stage'}
-            - ICP Score: {lead.qualification_score}/100
-
-            OUR OFFER:
-            We build AI-powered lead generation systems that deliver 400+ qualified leads per week, fully automated. We replace manual prospecting that typically costs sales teams 20-40 hours per week.
-
-            EMAIL RULES:
-            - Subject line: short, curiosity-driven, no clickbait
-            - Opening: reference something specific about their company or role
-            - Value prop: one clear sentence on what we do and the outcome
-            - Social proof: mention "sales teams at Series B-G companies"
-            - CTA: ask for a 20-minute call, keep it low pressure
-            - Tone: confident, peer-to-peer, not salesy
-            - Length: 5-7 sentences max, no fluff
-            - No em-dashes
-
-            Respond in this exact format:
-            SUBJECT: <subject line here>
-            BODY: <email body here>"""
-
-    def draft_email(self, lead: QualifiedLead) -> OutreachResult:
+        return self._PROMPT_TMPL.format_map({
+            "name": lead.contact_name,
+            "title": lead.contact_title or "",
+            "company": lead.company_name or "",
+            "industry": lead.industry or "B2B SaaS",
+            "funding": lead.funding_stage or "Growth stage",
+            "score": lead.qualification_score,
+        })
+
+    def _completion_params(self, lead: QualifiedLead) -> dict:
+        """Chat completion parameters shared by real-time and batch drafting."""
+        return {
+            "model": self.MODEL,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": self.SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": self._build_prompt(lead)
+                }
+            ],
+            "temperature": 0.7,
+            "max_tokens": 400,
+            "response_format": {"type": "json_object"},
+        }
+
+    def _parse_email(self, raw: str) -> tuple[str, str]:
+        """Split the model output into subject and body."""
+        try:
+            email = orjson.loads(raw)
+            return str(email.get("subject") or "").strip(), str(email.get("body") or "").strip()
+        except (orjson.JSONDecodeError, AttributeError):
+            pass
+
+        m = _PARSE_RE.search(raw)
+        if m is None:
+            return "", raw
+        return m.group("subject").strip(), m.group("body").strip()
+
+    def _to_result(
+        self,
+        lead: QualifiedLead,
+        subject: str = "",
+        body: str = "",
+        status: str = "drafted",
+    ) -> OutreachResult:
+        return OutreachResult.model_construct(
+            contact_name=lead.contact_name,
+            contact_title=lead.contact_title,
+            contact_email=lead.contact_email,
+            company_name=lead.company_name,
+            qualification_score=lead.qualification_score,
+            email_subject=subject,
+            email_body=body,
+            outreach_status=status,
+        )
+
+    async def draft_email(self, lead: QualifiedLead) -> OutreachResult:
         """Draft a personalized cold email for a single lead."""
         logger.info(f"Drafting email for: {lead.contact_name} @ {lead.company_name}")
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert B2B sales copywriter who writes concise, personalized cold emails that get replies."
-                    },
-                    {
-                        "role": "user",
-                        "content": self._build_prompt(lead)
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=400,
-            )
+            async with throttle("openai"):
+                response = await self.client.chat.completions.create(
+                    **self._completion_params(lead)
+                )
 
             raw = response.choices[0].message.content.strip()
-
-            # Parse subject and body
-            subject = ""
-            body = ""
-            for line in raw.split("\n"):
-                if line.startswith("SUBJECT:"):
-                    subject = line.replace("SUBJECT:", "").strip()
-                elif line.startswith("BODY:"):
-                    body = line.replace("BODY:", "").strip()
-                elif body:
-                    body += "\n" + line
-
-            return OutreachResult(
-                contact_name=lead.contact_name,
-                contact_title=lead.contact_title,
-                contact_email=lead.contact_email,
-                company_name=lead.company_name,
-                qualification_score=lead.qualification_score,
-                email_subject=subject,
-                email_body=body.strip(),
-            )
+            subject, body = self._parse_email(raw)
+            return self._to_result(lead, subject, body)
 
         except Exception as e:
             logger.error(f"Failed to draft email for {lead.contact_name}: {e}")
-            return OutreachResult(
-                contact_name=lead.contact_name,
-                contact_title=lead.contact_title,
-                contact_email=lead.contact_email,
-                company_name=lead.company_name,
-                qualification_score=lead.qualification_score,
-                email_subject="",
-                email_body="",
-                outreach_status="failed",
-            )
-
-    def draft_all(self, leads: list[QualifiedLead]) -> list[OutreachResult]:
-        """Draft emails for all qualified leads."""
-        results = []
+            return self._to_result(lead, status="failed")
+
+    async def draft_all(self, leads: list[QualifiedLead]) -> list[OutreachResult]:
+        """Draft emails for all qualified leads concurrently."""
         qualified = [l for l in leads if l.icp_match]
         logger.info(f"Drafting emails for {len(qualified)} qualified leads")
 
-        for lead in qualified:
-            result = self.draft_email(lead)
-            results.append(result)
+        results = await asyncio.gather(*(self.draft_email(lead) for lead in qualified))
 
         logger.info(f"Outreach drafting complete: {len(results)} emails written")
+        return list(results)
+
+    async def draft_all_batch(
+        self,
+        leads: list[QualifiedLead],
+        poll_interval: float = 60.0,
+    ) -> list[OutreachResult]:
+        """Draft emails through the OpenAI Batch API (24h window, half the cost).
+
+        Meant for large offline runs: submits one JSONL batch, polls until it
+        finishes, then parses the results in lead order.
+        """
+        qualified = [l for l in leads if l.icp_match]
+        if not qualified:
+            return []
+
+        lines = [
+            orjson.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": self.BATCH_ENDPOINT,
+                "body": self._completion_params(lead),
+            })
+            for i, lead in enumerate(qualified)
+        ]
+        batch_file = await self.client.files.create(
+            file=("outreach_batch.jsonl", b"\n".join(lines)),
+            purpose="batch",
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=self.BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        logger.info(f"Submitted outreach batch {batch.id} for {len(qualified)} leads")
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(poll_interval)
+            batch = await self.client.batches.retrieve(batch.id)
+        logger.info(f"Outreach batch {batch.id} finished: {batch.status}")
+
+        drafts: dict[str, str] = {}
+        if batch.output_file_id:
+            output = await self.client.files.content(batch.output_file_id)
+            for line in output.text.splitlines():
+                item = orjson.loads(line)
+                response = item.get("response") or {}
+                if response.get("status_code") == 200:
+                    content = response["body"]["choices"][0]["message"]["content"]
+                    drafts[item["custom_id"]] = content.strip()
+
+        results = []
+        for i, lead in enumerate(qualified):
+            raw = drafts.get(str(i))
+            if raw is None:
+                logger.error(f"Failed to draft email for {lead.contact_name}: no batch result")
+                results.append(self._to_result(lead, status="failed"))
+                continue
+            subject, body = self._parse_email(raw)
+            results.append(self._to_result(lead, subject, body))
+
+        logger.info(f"Outreach batch complete: {len(drafts)}/{len(qualified)} emails written")
         return results
 
 
@@ -130,12 +219,13 @@ if __name__ == "__main__":
     from agents.enrichment.enrichment_agent import EnrichmentAgent
     from agents.qualification.qualification_agent import QualificationAgent
 
-    leads = DiscoveryAgent().search_multiple_domains(["salesloft.com", "outreach.io"])
-    enriched = EnrichmentAgent().enrich_all(leads)
-    qualified = QualificationAgent().qualify_all(enriched)
+    async def main():
+        leads = await DiscoveryAgent().search_multiple_domains(["salesloft.com", "outreach.io"])
+        enriched = await EnrichmentAgent().enrich_all(leads)
+        qualified = QualificationAgent().qualify_all(enriched)
+        return await OutreachAgent().draft_all(qualified)
 
-    outreach = OutreachAgent()
-    emails = outreach.draft_all(qualified)
+    emails = asyncio.run(main())
 
     print(f"\nDrafted {len(emails)} emails:\n")
     for email in emails:
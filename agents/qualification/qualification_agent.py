@@ -1,30 +1,12 @@
 # agents/qualification/qualification_agent.py
-from pydantic import BaseModel
 from loguru import logger
 from typing import Optional
-import sys, os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from icp_config import icp
+from icp_config import compile_alternation, icp
 from agents.enrichment.enrichment_agent import EnrichedLead
 
 
-class QualifiedLead(BaseModel):
-    # Carry over all enriched fields
-    contact_name: str
-    contact_title: Optional[str] = None
-    contact_email: Optional[str] = None
-    contact_linkedin: Optional[str] = None
-    company_name: Optional[str] = None
-    company_domain: Optional[str] = None
-    industry: Optional[str] = None
-    employee_count: Optional[int] = None
-    headquarters: Optional[str] = None
-    funding_stage: Optional[str] = None
-    annual_revenue: Optional[str] = None
-    technology_stack: Optional[list[str]] = None
-    email_verified: bool = False
-
+class QualifiedLead(EnrichedLead):
     # Qualification results
     qualification_score: int = 0
     qualification_notes: list[str] = []
@@ -32,71 +14,77 @@ class QualifiedLead(BaseModel):
 
 
 class QualificationAgent:
+    ADJACENT_INDUSTRIES = ["tech", "software", "internet", "information", "services"]
+
+    def __init__(self) -> None:
+        self._adjacent_re = compile_alternation(self.ADJACENT_INDUSTRIES)
 
-    def _score_industry(self, industry: Optional[str]) -> tuple[int, str]:
+    def _score_industry(self, industry: Optional[str], industry_l: str) -> tuple[int, str]:
         """Score 0-25 based on industry match."""
         if not industry:
             return 0, "Industry unknown"
-        for target in icp.industries:
-            if target.lower() in industry.lower():
-                return icp.scoring_weights["industry_match"], f"Industry match: {industry}"
+        if industry_l in icp.industries_set or icp.industries_re.search(industry_l):
+            return icp.scoring_weights.industry_match, f"Industry match: {industry}"
         # Partial credit for tech-adjacent industries
-        if any(k in industry.lower() for k in ["tech", "software", "internet", "information", "services"]):
-            return icp.scoring_weights["industry_match"], f"Industry match: {industry}"
+        if self._adjacent_re.search(industry_l):
+            return icp.scoring_weights.industry_match, f"Industry match: {industry}"
         return 0, f"Industry mismatch: {industry}"
 
     def _score_company_size(self, employee_count: Optional[int]) -> tuple[int, str]:
         """Score 0-20 based on employee count."""
         if not employee_count:
             # Give partial credit — free Apollo tier withholds headcount
-            partial = icp.scoring_weights["company_size_match"] // 2
+            partial = icp.scoring_weights.company_size_match // 2
             return partial, "Employee count unavailable (partial credit)"
         if icp.min_employees <= employee_count <= icp.max_employees:
-            return icp.scoring_weights["company_size_match"], f"Size match: {employee_count} employees"
+            return icp.scoring_weights.company_size_match, f"Size match: {employee_count} employees"
         if employee_count < icp.min_employees:
             return 0, f"Too small: {employee_count} employees"
         # Large companies: partial credit (budget but slower sales cycle)
-        partial = icp.scoring_weights["company_size_match"] // 2
+        partial = icp.scoring_weights.company_size_match // 2
         return partial, f"Larger than ideal: {employee_count} employees"
 
-    def _score_title(self, title: Optional[str]) -> tuple[int, str]:
+    def _score_title(self, title: Optional[str], title_l: str) -> tuple[int, str]:
         """Score 0-25 based on decision-maker title."""
         if not title:
             return 0, "Title unknown"
-        for target in icp.target_titles:
-            if target.lower() in title.lower():
-                return icp.scoring_weights["title_match"], f"Title match: {title}"
+        if title_l in icp.titles_set or icp.titles_re.search(title_l):
+            return icp.scoring_weights.title_match, f"Title match: {title}"
         return 0, f"Title not in ICP: {title}"
 
-    def _score_location(self, headquarters: Optional[str]) -> tuple[int, str]:
+    def _score_location(self, headquarters: Optional[str], hq_l: str) -> tuple[int, str]:
         """Score 0-15 based on location."""
         if not headquarters:
-            return icp.scoring_weights["location_match"] // 2, "Location unknown (partial credit)"
-        for loc in icp.target_locations:
-            if loc.lower() in headquarters.lower():
-                return icp.scoring_weights["location_match"], f"Location match: {headquarters}"
+            return icp.scoring_weights.location_match // 2, "Location unknown (partial credit)"
+        if hq_l in icp.locations_set or icp.locations_re.search(hq_l):
+            return icp.scoring_weights.location_match, f"Location match: {headquarters}"
         # US cities won't contain "United States" — give partial credit
-        return icp.scoring_weights["location_match"] // 2, f"Location partial credit: {headquarters}"
+        return icp.scoring_weights.location_match // 2, f"Location partial credit: {headquarters}"
 
-    def _score_technology(self, tech_stack: Optional[list[str]]) -> tuple[int, str]:
+    def _score_technology(self, tech_stack: Optional[list[str]], tech_l: list[str]) -> tuple[int, str]:
         """Score 0-15 based on technology signals."""
         if not tech_stack:
-            return icp.scoring_weights["technology_match"] // 2, "Tech stack unavailable (partial credit)"
-        matches = [t for t in icp.technology_signals if any(
-            t.lower() in tech.lower() for tech in tech_stack
-        )]
+            return icp.scoring_weights.technology_match // 2, "Tech stack unavailable (partial credit)"
+        found = set(icp.technology_re.findall("\n".join(tech_l)))
+        matches = [name for key, name in icp.technology_names.items() if key in found]
         if matches:
-            return icp.scoring_weights["technology_match"], f"Tech signals: {', '.join(matches)}"
+            return icp.scoring_weights.technology_match, f"Tech signals: {', '.join(matches)}"
         return 0, "No matching technology signals"
 
     def qualify_lead(self, lead: EnrichedLead) -> QualifiedLead:
         """Score a single lead against ICP criteria."""
         logger.info(f"Qualifying: {lead.contact_name} @ {lead.company_name}")
 
+        # Lowercase each field once and share it across the scorers
+        industry_l = (lead.industry or "").lower()
+        title_l = (lead.contact_title or "").lower()
+        hq_l = (lead.headquarters or "").lower()
+        tech_l = [t.lower() for t in (lead.technology_stack or [])]
+
         notes = []
         total_score = 0
 
-        industry_score, industry_note = self._score_industry(lead.industry)
+        industry_score, industry_note = self._score_industry(lead.industry, industry_l)
         total_score += industry_score
         notes.append(industry_note)
 
@@ -104,34 +92,23 @@ class QualificationAgent:
         total_score += size_score
         notes.append(size_note)
 
-        title_score, title_note = self._score_title(lead.contact_title)
+        title_score, title_note = self._score_title(lead.contact_title, title_l)
         total_score += title_score
         notes.append(title_note)
 
-        location_score, location_note = self._score_location(lead.headquarters)
+        location_score, location_note = self._score_location(lead.headquarters, hq_l)
         total_score += location_score
         notes.append(location_note)
 
-        tech_score, tech_note = self._score_technology(lead.technology_stack)
+        tech_score, tech_note = self._score_technology(lead.technology_stack, tech_l)
         total_score += tech_score
         notes.append(tech_note)
 
         icp_match = total_score >= icp.min_qualification_score
 
-        return QualifiedLead(
-            contact_name=lead.contact_name,
-            contact_title=lead.contact_title,
-            contact_email=lead.contact_email,
-            contact_linkedin=lead.contact_linkedin,
-            company_name=lead.company_name,
-            company_domain=lead.company_domain,
-            industry=lead.industry,
-            employee_count=lead.employee_count,
-            headquarters=lead.headquarters,
-            funding_stage=lead.funding_stage,
-            annual_revenue=lead.annual_revenue,
-            technology_stack=lead.technology_stack,
-            email_verified=lead.email_verified,
+        # Everything is copied from a validated EnrichedLead; skip re-validation
+        return QualifiedLead.model_construct(
+            **lead.model_dump(),
             qualification_score=total_score,
             qualification_notes=notes,
             icp_match=icp_match,
@@ -155,11 +132,15 @@ class QualificationAgent:
 
 
 if __name__ == "__main__":
+    import asyncio
     from agents.discovery.discovery_agent import DiscoveryAgent
     from agents.enrichment.enrichment_agent import EnrichmentAgent
 
-    leads = DiscoveryAgent().search_multiple_domains(["salesloft.com", "outreach.io"])
-    enriched = EnrichmentAgent().enrich_all(leads)
+    async def main():
+        leads = await DiscoveryAgent().search_multiple_domains(["salesloft.com", "outreach.io"])
+        return await EnrichmentAgent().enrich_all(leads)
+
+    enriched = asyncio.run(main())
     qualified = QualificationAgent().qualify_all(enriched)
 
     print(f"\nQualification Results ({len(qualified)} leads):\n")
@@ -1,15 +1,22 @@
 # api.py
 import uuid
 import asyncio
+import hashlib
 import logging
 from datetime import datetime
+from threading import Lock
 from typing import Optional
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Query
+import orjson
+from cachetools import TTLCache, cached
+from fastapi import FastAPI, BackgroundTasks, Header, HTTPException, Query, Request, Response
 from pydantic import BaseModel
-from supabase import create_client
+from redis.asyncio import Redis
 from dotenv import load_dotenv
 import os
 
+from agents.http_client import close_client
+from db import get_supabase
+
 load_dotenv()
 
 # --- Logging ---
@@ -17,7 +24,7 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # --- Supabase client ---
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+supabase = get_supabase()
 
 # --- FastAPI app ---
 app = FastAPI(
@@ -26,8 +33,44 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# --- In-memory job tracker ---
-jobs: dict[str, dict] = {}
+# --- Redis job tracker (shared across workers, survives restarts) ---
+# No localhost fallback: without a reachable Redis every job endpoint would
+# 500 at request time, so refuse to start instead
+REDIS_URL = os.getenv("REDIS_URL")
+if not REDIS_URL:
+    raise RuntimeError(
+        "REDIS_URL is not set; the API stores pipeline jobs in Redis "
+        "(e.g. REDIS_URL=redis://localhost:6379/0)"
+    )
+redis_client = Redis.from_url(REDIS_URL, decode_responses=True)
+JOB_TTL_SECONDS = 86_400
+RUNNING_JOBS_KEY = "jobs:running"
+
+
+async def save_job(job_id: str, **fields) -> None:
+    """Write job fields and keep the running-jobs set in step with status."""
+    key = f"job:{job_id}"
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping={k: "" if v is None else v for k, v in fields.items()})
+        pipe.expire(key, JOB_TTL_SECONDS)
+        if fields.get("status") == "running":
+            pipe.sadd(RUNNING_JOBS_KEY, job_id)
+        elif "status" in fields:
+            pipe.srem(RUNNING_JOBS_KEY, job_id)
+        await pipe.execute()
+
+
+async def increment_job(job_id: str, **counters: int) -> None:
+    """Atomically bump job counters so concurrent domain runs don't lose updates."""
+    async with redis_client.pipeline(transaction=True) as pipe:
+        for field, amount in counters.items():
+            pipe.hincrby(f"job:{job_id}", field, amount)
+        await pipe.execute()
+
+
+async def load_job(job_id: str) -> Optional[dict]:
+    job = await redis_client.hgetall(f"job:{job_id}")
+    return job or None
 
 
 # --- Request / Response models ---
@@ -59,35 +102,63 @@ async def run_pipeline_background(job_id: str, domains: list[str]):
     """Runs the full LangGraph pipeline in the background."""
     from orchestrator import run_pipeline  # import here to avoid circular imports
 
-    jobs[job_id]["status"] = "running"
+    await save_job(job_id, status="running")
     total_qualified = 0
     total_discovered = 0
 
+    tasks = []
+    for domain in domains:
+        logger.info(f"[Job {job_id}] Processing domain: {domain}")
+        tasks.append(asyncio.create_task(run_pipeline(domain)))
+
     try:
-        for domain in domains:
-            logger.info(f"[Job {job_id}] Processing domain: {domain}")
-            result = await asyncio.to_thread(run_pipeline, domain)
+        for next_result in asyncio.as_completed(tasks):
+            result = await next_result
 
             discovered = result.get("leads_discovered", 0)
             qualified = result.get("leads_qualified", 0)
             total_discovered += discovered
             total_qualified += qualified
 
-            jobs[job_id]["domains_processed"] += 1
-            jobs[job_id]["leads_discovered"] += discovered
-            jobs[job_id]["leads_qualified"] += qualified
+            await increment_job(
+                job_id,
+                domains_processed=1,
+                leads_discovered=discovered,
+                leads_qualified=qualified,
+            )
 
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+        await save_job(job_id, status="completed", completed_at=datetime.utcnow().isoformat())
         logger.info(f"[Job {job_id}] Pipeline completed. Qualified leads: {total_qualified}")
 
     except Exception as e:
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = str(e)
-        jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+        for task in tasks:
+            task.cancel()
+        await save_job(
+            job_id,
+            status="failed",
+            error=str(e),
+            completed_at=datetime.utcnow().isoformat(),
+        )
         logger.error(f"[Job {job_id}] Pipeline failed: {e}")
 
 
+@app.on_event("shutdown")
+async def close_http_client():
+    """Release pooled Hunter/Apollo connections."""
+    await close_client()
+
+
+@app.on_event("shutdown")
+async def close_redis():
+    await redis_client.aclose()
+
+
+@cached(cache=TTLCache(maxsize=1, ttl=30), lock=Lock())
+def lead_metrics() -> dict:
+    """Lead counts aggregated in Postgres (sql/leads_metrics.sql), cached for 30s."""
+    return supabase.rpc("leads_metrics").execute().data
+
+
 # --- Endpoints ---
 
 @app.get("/")
@@ -101,25 +172,54 @@ def root():
 
 
 @app.post("/pipeline/run", response_model=PipelineResponse)
-async def trigger_pipeline(request: PipelineRequest, background_tasks: BackgroundTasks):
+async def trigger_pipeline(
+    request: PipelineRequest,
+    background_tasks: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(
+        None, description="Retries with the same key return the original job instead of starting a new one"
+    )
+):
     """Trigger the full lead generation pipeline for a list of domains."""
     if not request.domains:
         raise HTTPException(status_code=400, detail="At least one domain is required.")
 
     job_id = str(uuid.uuid4())
-    started_at = datetime.utcnow().isoformat()
 
-    jobs[job_id] = {
-        "status": "queued",
-        "domains_processed": 0,
-        "leads_discovered": 0,
-        "leads_qualified": 0,
-        "error": None,
-        "started_at": started_at,
-        "completed_at": None
-    }
+    if idempotency_key:
+        idem_key = f"idem:{idempotency_key}"
+        claimed = await redis_client.set(idem_key, job_id, ex=JOB_TTL_SECONDS, nx=True)
+        if not claimed:
+            existing_id = await redis_client.get(idem_key)
+            job = await load_job(existing_id) if existing_id else None
+            if job is None:
+                raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress.")
+            return PipelineResponse(
+                job_id=existing_id,
+                status=job["status"],
+                message="Pipeline already started for this Idempotency-Key.",
+                started_at=job["started_at"]
+            )
 
-    background_tasks.add_task(run_pipeline_background, job_id, request.domains)
+    started_at = datetime.utcnow().isoformat()
+
+    try:
+        await save_job(
+            job_id,
+            status="queued",
+            domains_processed=0,
+            leads_discovered=0,
+            leads_qualified=0,
+            error=None,
+            started_at=started_at,
+            completed_at=None,
+        )
+
+        background_tasks.add_task(run_pipeline_background, job_id, request.domains)
+    except Exception:
+        # Release the claim so a client retry with the same key can start the job
+        if idempotency_key:
+            await redis_client.delete(idem_key)
+        raise
 
     return PipelineResponse(
         job_id=job_id,
@@ -130,64 +230,81 @@ async def trigger_pipeline(request: PipelineRequest, background_tasks: Backgroun
 
 
 @app.get("/pipeline/status/{job_id}", response_model=JobStatus)
-def get_job_status(job_id: str):
+async def get_job_status(job_id: str):
     """Check the status of a running or completed pipeline job."""
-    if job_id not in jobs:
+    job = await load_job(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job ID not found.")
 
-    job = jobs[job_id]
     return JobStatus(
         job_id=job_id,
         status=job["status"],
         domains_processed=job["domains_processed"],
         leads_discovered=job["leads_discovered"],
         leads_qualified=job["leads_qualified"],
-        error=job.get("error"),
+        error=job.get("error") or None,
         started_at=job["started_at"],
-        completed_at=job.get("completed_at")
+        completed_at=job.get("completed_at") or None
     )
 
 
 @app.get("/leads")
 def get_leads(
+    request: Request,
+    response: Response,
     min_score: Optional[int] = Query(None, description="Minimum qualification score"),
-    limit: int = Query(50, description="Max number of leads to return")
+    limit: int = Query(50, ge=1, description="Max number of leads to return"),
+    offset: int = Query(0, ge=0, description="Number of leads to skip")
 ):
-    """Retrieve leads from Supabase with optional score filter."""
+    """Retrieve leads from Supabase, highest score first, with optional score filter."""
     try:
-        query = supabase.table("leads").select("*").limit(limit)
+        # Served by leads_qual_score_idx (sql/leads_indexes.sql)
+        query = (
+            supabase.table("leads")
+            .select("*")
+            .order("qualification_score", desc=True, nullsfirst=False)
+            .range(offset, offset + limit - 1)
+        )
 
         if min_score is not None:
             query = query.gte("qualification_score", min_score)
 
-        response = query.execute()
-        leads = response.data
-
-        return {
-            "total": len(leads),
-            "leads": leads
-        }
+        leads = query.execute().data
 
     except Exception as e:
         logger.error(f"Failed to fetch leads: {e}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+    body = {
+        "total": len(leads),
+        "offset": offset,
+        "leads": leads
+    }
+
+    etag = f'"{hashlib.sha1(orjson.dumps(body, option=orjson.OPT_SORT_KEYS)).hexdigest()}"'
+    cache_headers = {"ETag": etag, "Cache-Control": "public, max-age=30"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cache_headers)
+
+    response.headers.update(cache_headers)
+    return body
+
 
 @app.get("/metrics")
-def get_metrics():
+async def get_metrics():
     """Return pipeline performance metrics."""
     try:
-        all_leads = supabase.table("leads").select("qualification_score, contact_email").execute().data
-        total = len(all_leads)
-        qualified = sum(1 for l in all_leads if (l.get("qualification_score") or 0) >= 60)
-        with_email = sum(1 for l in all_leads if l.get("contact_email"))
+        agg = await asyncio.to_thread(lead_metrics)
+        total = agg["total"]
+        qualified = agg["qualified"]
+        with_email = agg["with_email"]
 
         return {
             "total_leads_in_db": total,
             "qualified_leads": qualified,
             "qualification_rate": f"{round(qualified / total * 100, 1)}%" if total else "0%",
             "email_enrichment_rate": f"{round(with_email / total * 100, 1)}%" if total else "0%",
-            "active_jobs": len([j for j in jobs.values() if j["status"] == "running"])
+            "active_jobs": await redis_client.scard(RUNNING_JOBS_KEY)
         }
 
     except Exception as e:
@@ -12,6 +12,7 @@ class Settings(BaseSettings):
     hunter_api_key: str
     log_level: str = "INFO"
     environment: str = "development"
+    persistent_cache: bool = False
 
     class Config:
         env_file = ".env"
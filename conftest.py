@@ -0,0 +1,17 @@
+# conftest.py
+# Lives at the repo root so pytest puts the root on sys.path and the tests can
+# import the top-level modules (config, icp_config, db, ...) without installing.
+import os
+
+# Environment variables beat env_file in pydantic-settings, so placeholders are
+# only set when there is no .env (resolved from the cwd, like `settings`);
+# with real credentials present test_supabase still reaches the real database
+if not os.path.exists(".env"):
+    for _key in ("OPENAI_API_KEY", "APOLLO_API_KEY", "HUNTER_API_KEY"):
+        os.environ.setdefault(_key, "test")
+    os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+    os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoidGVzdCJ9.test")
+
+# api.py refuses to import without REDIS_URL; its tests swap in a fake client,
+# so the URL is never connected to
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/15")
@@ -0,0 +1,66 @@
+# db.py
+"""
+Process-wide Supabase client.
+
+Every caller (API, export layer, persistent cache) shares one client so
+PostgREST requests reuse the same pooled HTTP/2 keep-alive connections
+instead of each client paying its own TCP + TLS setup.
+"""
+import functools
+
+import httpx
+from cachetools import TTLCache, cached
+from postgrest.utils import SyncClient
+from supabase import Client, create_client
+
+from config import settings
+
+
+@functools.lru_cache(maxsize=1)
+def get_supabase() -> Client:
+    """Return the shared Supabase client, creating it on first use.
+
+    The tuned PostgREST session lives on `client.postgrest`, which supabase-py
+    rebuilds from scratch on auth events (SIGNED_IN, TOKEN_REFRESHED,
+    SIGNED_OUT). This client only uses the service key and never signs in,
+    but calling client.auth would silently swap the default session back in.
+    """
+    client = create_client(settings.supabase_url, settings.supabase_key)
+
+    # supabase-py doesn't expose pool settings, so replace PostgREST's default
+    # session with one that differs only in its connection limits
+    postgrest = client.postgrest
+    default_session = postgrest.session
+    postgrest.session = SyncClient(
+        base_url=postgrest.base_url,
+        headers=postgrest.headers,
+        timeout=postgrest.timeout,
+        verify=postgrest.verify,
+        proxy=postgrest.proxy,
+        http2=True,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_keepalive_connections=20,
+            max_connections=40,
+            keepalive_expiry=60,
+        ),
+    )
+    default_session.close()
+    return client
+
+
+@cached(cache=TTLCache(maxsize=32, ttl=60))
+def estimated_row_count(table: str) -> int:
+    """Planner-estimated row count for `table`, cached for 60 seconds per table.
+
+    count="estimated" reads the planner statistics instead of running a full
+    COUNT(*) scan. Use count="exact" only from maintenance/reporting paths
+    where precision is worth the scan.
+    """
+    response = (
+        get_supabase().table(table)
+        .select("*", count="estimated")
+        .limit(1)
+        .execute()
+    )
+    return response.count or 0
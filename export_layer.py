@@ -1,131 +1,242 @@
 # export_layer.py
 import csv
+import operator
 import os
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Union
+import httpx
 from loguru import logger
-from supabase import create_client
-import sys
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from postgrest.exceptions import APIError
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
 
-from config import settings
+from db import get_supabase
 from agents.outreach.outreach_agent import OutreachResult
 from agents.qualification.qualification_agent import QualifiedLead
 
+_FIELDNAMES = (
+    "contact_name", "contact_title", "contact_email",
+    "contact_linkedin", "company_name", "company_domain",
+    "industry", "employee_count", "headquarters",
+    "funding_stage", "annual_revenue", "qualification_score",
+    "icp_match", "email_verified", "email_subject", "email_body",
+)
+# Every CSV column except the two outreach fields comes straight off the lead
+_LEAD_COLUMNS = _FIELDNAMES[:-2]
+_LEAD_FIELDS = frozenset(_LEAD_COLUMNS)
+_ROW_GETTER = operator.itemgetter(*_FIELDNAMES)
+
+# Error codes worth retrying: SQLSTATE connection exceptions, serialization
+# failures/deadlocks, insufficient resources, statement timeout and admin
+# shutdown, plus PostgREST's own 503/504 codes (PGRST000-PGRST003)
+_TRANSIENT_CODES = ("08", "40", "53", "57014", "57P", "PGRST00")
+# SQLSTATE classes that point at a specific row: data exceptions and
+# integrity constraint violations
+_ROW_ERROR_SQLSTATES = ("22", "23")
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """True for network errors, 429/5xx and transient Postgres errors, but not other 4xx."""
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, APIError):
+        # postgrest puts the HTTP status in `code` when the error body isn't JSON
+        if isinstance(exc.code, int):
+            return exc.code == 429 or exc.code >= 500
+        return str(exc.code or "").startswith(_TRANSIENT_CODES)
+    return False
+
+
+def _is_row_error(exc: BaseException) -> bool:
+    """True when the database rejected the data itself, so other rows may still succeed."""
+    return (
+        isinstance(exc, APIError)
+        and isinstance(exc.code, str)
+        and exc.code.startswith(_ROW_ERROR_SQLSTATES)
+    )
+
+
+upsert_retry = retry(
+    stop=stop_after_attempt(5),
+    wait=wait_random_exponential(multiplier=0.5, max=10),
+    retry=retry_if_exception(_is_transient),
+    reraise=True,
+)
+
+
+def _lead_rows(
+    leads: Iterable[QualifiedLead], email_map: dict[str, OutreachResult]
+) -> Iterator[dict]:
+    """Flatten each lead and its outreach draft into the row both sinks export.
+
+    The outreach fields are None for leads without a draft.
+    """
+    for lead in leads:
+        row = lead.model_dump(include=_LEAD_FIELDS)
+        outreach = email_map.get(lead.contact_name)
+        row["email_subject"] = outreach.email_subject if outreach else None
+        row["email_body"] = outreach.email_body if outreach else None
+        yield row
+
 
 class ExportLayer:
+    UPSERT_CHUNK_SIZE = 500
 
-    def __init__(self) -> None:
-        self.supabase = create_client(settings.supabase_url, settings.supabase_key)
+    def __init__(self, buffer_bytes: int = 1 << 20, sync: bool = False) -> None:
+        self.supabase = get_supabase()
         self.output_dir = "data"
+        # Write buffer for CSV exports; a large buffer means far fewer write() syscalls
+        self.buffer_bytes = buffer_bytes
+        # fsync CSV exports before publishing them, for durability-critical runs
+        self.sync = sync
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def to_csv(self, leads: list[QualifiedLead], emails: list[OutreachResult]) -> str:
+    def to_csv(
+        self,
+        leads: Iterable[QualifiedLead],
+        emails: list[OutreachResult],
+        email_map: Optional[dict[str, OutreachResult]] = None,
+    ) -> str:
         """Export qualified leads + email drafts to CSV."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if email_map is None:
+            email_map = {e.contact_name: e for e in emails}
+        return self._write_csv(_lead_rows(leads, email_map))
+
+    def _write_csv(self, rows: Iterable[dict]) -> str:
+        # UTC timestamp with a microsecond suffix so back-to-back exports don't collide
+        secs, nanos = divmod(time.time_ns(), 1_000_000_000)
+        timestamp = f"{time.strftime('%Y%m%d_%H%M%S', time.gmtime(secs))}_{nanos // 1000:06d}"
         filename = f"{self.output_dir}/leads_{timestamp}.csv"
 
-        # Build email lookup by contact name
-        email_map = {e.contact_name: e for e in emails}
-
-        fieldnames = [
-            "contact_name", "contact_title", "contact_email",
-            "contact_linkedin", "company_name", "company_domain",
-            "industry", "employee_count", "headquarters",
-            "funding_stage", "annual_revenue", "qualification_score",
-            "icp_match", "email_verified", "email_subject", "email_body",
-        ]
-
-        with open(filename, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for lead in leads:
-                outreach = email_map.get(lead.contact_name)
-                writer.writerow({
-                    "contact_name": lead.contact_name,
-                    "contact_title": lead.contact_title,
-                    "contact_email": lead.contact_email,
-                    "contact_linkedin": lead.contact_linkedin,
-                    "company_name": lead.company_name,
-                    "company_domain": lead.company_domain,
-                    "industry": lead.industry,
-                    "employee_count": lead.employee_count,
-                    "headquarters": lead.headquarters,
-                    "funding_stage": lead.funding_stage,
-                    "annual_revenue": lead.annual_revenue,
-                    "qualification_score": lead.qualification_score,
-                    "icp_match": lead.icp_match,
-                    "email_verified": lead.email_verified,
-                    "email_subject": outreach.email_subject if outreach else "",
-                    "email_body": outreach.email_body if outreach else "",
-                })
+        # Write to a temp file and rename it into place so readers never see a partial CSV
+        tmp_filename = f"{filename}.tmp"
+        try:
+            with open(tmp_filename, "w", newline="", encoding="utf-8", buffering=self.buffer_bytes) as f:
+                # Plain csv.writer with tuple rows avoids DictWriter's per-field dict lookups;
+                # csv writes the None outreach fields of undrafted leads as empty strings
+                writer = csv.writer(f)
+                writer.writerow(_FIELDNAMES)
+                writer.writerows(map(_ROW_GETTER, rows))
+
+                if self.sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_filename, filename)
+        except Exception:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+            raise
 
         logger.info(f"CSV exported: {filename}")
         return filename
 
-    def to_supabase(self, leads: list[QualifiedLead], emails: list[OutreachResult]) -> int:
-        """Save qualified leads to Supabase. Returns count of saved leads."""
-        email_map = {e.contact_name: e for e in emails}
-        saved = 0
+    def to_supabase(
+        self,
+        leads: Iterable[QualifiedLead],
+        emails: list[OutreachResult],
+        email_map: Optional[dict[str, OutreachResult]] = None,
+    ) -> int:
+        """Bulk-upsert qualified leads to Supabase. Returns count of saved leads."""
+        if email_map is None:
+            email_map = {e.contact_name: e for e in emails}
+        return self._write_supabase(_lead_rows(leads, email_map))
+
+    def _write_supabase(self, rows: Iterable[dict]) -> int:
+        # Materialize one chunk of rows at a time so memory stays bounded
+        total = saved = 0
+        row_iter = iter(rows)
+        while batch := list(islice(row_iter, self.UPSERT_CHUNK_SIZE)):
+            total += len(batch)
+
+            # Postgres rejects an upsert batch that touches the same row twice, so
+            # keep the last record per email within the chunk (later chunks simply
+            # overwrite via on_conflict); rows without an email are always inserted
+            records = {}
+            for i, row in enumerate(batch):
+                # Rows are shared with the CSV writer, so copy rather than mutate
+                record = {k: row[k] for k in _LEAD_COLUMNS}
+                record["outreach_email_draft"] = row["email_body"]
+                record["outreach_status"] = "pending" if row["email_body"] is None else "drafted"
+                record["data_source"] = "hunter+apollo"
+                record["enrichment_status"] = "enriched"
+                records[row["contact_email"] or i] = record
+            chunk = list(records.values())
 
-        for lead in leads:
-            outreach = email_map.get(lead.contact_name)
             try:
-                record = {
-                    "contact_name": lead.contact_name,
-                    "contact_title": lead.contact_title,
-                    "contact_email": lead.contact_email,
-                    "contact_linkedin": lead.contact_linkedin,
-                    "company_name": lead.company_name,
-                    "company_domain": lead.company_domain,
-                    "industry": lead.industry,
-                    "employee_count": lead.employee_count,
-                    "headquarters": lead.headquarters,
-                    "funding_stage": lead.funding_stage,
-                    "annual_revenue": lead.annual_revenue,
-                    "qualification_score": lead.qualification_score,
-                    "icp_match": lead.icp_match,
-                    "email_verified": lead.email_verified,
-                    "outreach_email_draft": outreach.email_body if outreach else None,
-                    "outreach_status": "drafted" if outreach else "pending",
-                    "data_source": "hunter+apollo",
-                    "enrichment_status": "enriched",
-                }
-                self.supabase.table("leads").upsert(
-                    record,
-                    on_conflict="contact_email"
-                ).execute()
-                saved += 1
+                saved += self._upsert(chunk)
             except Exception as e:
-                logger.error(f"Failed to save {lead.contact_name} to Supabase: {e}")
-                continue
+                if not _is_row_error(e):
+                    # Outage, exhausted retries or a request-level error: replaying
+                    # the chunk row by row would only hammer a failing server
+                    logger.error(f"Failed to save {len(chunk)} leads to Supabase: {e}")
+                    continue
+                # Retry a chunk with a bad record row by row so the rest still saves
+                logger.warning(f"Batch upsert of {len(chunk)} leads failed, retrying per row: {e}")
+                saved += self._upsert_rows(chunk)
+
+        logger.info(f"Supabase export complete: {saved}/{total} leads saved")
+        return saved
 
-        logger.info(f"Supabase export complete: {saved}/{len(leads)} leads saved")
+    @upsert_retry
+    def _upsert(self, records: Union[dict, list[dict]]) -> int:
+        """Upsert one or more lead records, retrying transient failures.
+
+        on_conflict="contact_email" makes a retried write idempotent for any
+        lead that has an email. Returns the number of rows PostgREST wrote.
+        """
+        response = self.supabase.table("leads").upsert(
+            records,
+            on_conflict="contact_email"
+        ).execute()
+        return len(response.data)
+
+    def _upsert_rows(self, rows: list[dict]) -> int:
+        """Upsert rows one at a time, logging and skipping any that fail."""
+        saved = 0
+        for row in rows:
+            try:
+                saved += self._upsert(row)
+            except Exception as e:
+                logger.error(f"Failed to save {row['contact_name']} to Supabase: {e}")
+                continue
         return saved
 
-    def export_all(self, leads: list[QualifiedLead], emails: list[OutreachResult]) -> dict:
+    def export_all(self, leads: Iterable[QualifiedLead], emails: list[OutreachResult]) -> dict:
         """Run both CSV and Supabase exports."""
         logger.info("Starting export...")
-        csv_file = self.to_csv(leads, emails)
-        supabase_count = self.to_supabase(leads, emails)
+        email_map = {e.contact_name: e for e in emails}
+        # Both sinks export the same fields, so flatten each lead once and share the rows
+        rows = list(_lead_rows(leads, email_map))
+        # Disk and network sinks are independent, so overlap them
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            future_csv = pool.submit(self._write_csv, rows)
+            future_sb = pool.submit(self._write_supabase, rows)
+            csv_file = future_csv.result()
+            supabase_count = future_sb.result()
         return {
             "csv_file": csv_file,
             "supabase_saved": supabase_count,
-            "total_leads": len(leads),
+            "total_leads": len(rows),
         }
 
 
 if __name__ == "__main__":
+    import asyncio
     from agents.discovery.discovery_agent import DiscoveryAgent
     from agents.enrichment.enrichment_agent import EnrichmentAgent
     from agents.qualification.qualification_agent import QualificationAgent
     from agents.outreach.outreach_agent import OutreachAgent
 
+    async def main():
+        leads = await DiscoveryAgent().search_multiple_domains(["salesloft.com", "outreach.io"])
+        enriched = await EnrichmentAgent().enrich_all(leads)
+        qualified = QualificationAgent().qualify_all(enriched)
+        emails = await OutreachAgent().draft_all(qualified)
+        return qualified, emails
+
     # Run full pipeline
-    leads = DiscoveryAgent().search_multiple_domains(["salesloft.com", "outreach.io"])
-    enriched = EnrichmentAgent().enrich_all(leads)
-    qualified = QualificationAgent().qualify_all(enriched)
-    emails = OutreachAgent().draft_all(qualified)
+    qualified, emails = asyncio.run(main())
 
     # Export
     exporter = ExportLayer()
@@ -1,8 +1,27 @@
 # icp_config.py
-from pydantic import BaseModel
-from typing import Optional
+import re
+from functools import cached_property
+from pydantic import BaseModel, ConfigDict
+from typing import NamedTuple, Optional
+
+
+def compile_alternation(terms: list[str]) -> re.Pattern:
+    """Compile a case-folded substring matcher for any of `terms`."""
+    alternatives = sorted((re.escape(t.lower()) for t in terms), key=len, reverse=True)
+    return re.compile("|".join(alternatives) or r"(?!)")
+
+
+class ScoringWeights(NamedTuple):
+    industry_match: int = 25
+    company_size_match: int = 20
+    title_match: int = 25
+    location_match: int = 15
+    technology_match: int = 15
+
 
 class ICPConfig(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     # Target Industries
     industries: list[str] = [
         "B2B SaaS",
@@ -61,13 +80,7 @@ class ICPConfig(BaseModel):
     ]
 
     # Scoring Weights (must sum to 100)
-    scoring_weights: dict[str, int] = {
-        "industry_match": 25,
-        "company_size_match": 20,
-        "title_match": 25,
-        "location_match": 15,
-        "technology_match": 15,
-    }
+    scoring_weights: ScoringWeights = ScoringWeights()
 
     # Qualification Threshold
     min_qualification_score: int = 60  # out of 100
@@ -81,6 +94,48 @@ class ICPConfig(BaseModel):
         "sales enablement",
     ]
 
+    # --- Derived lookups (lowercased, built once per config) ---
+    # Sets answer exact matches with a hash lookup; the regexes handle
+    # substring matches such as "VP of Sales, EMEA"
+    @cached_property
+    def industries_set(self) -> frozenset[str]:
+        return frozenset(t.lower() for t in self.industries)
+
+    @cached_property
+    def titles_set(self) -> frozenset[str]:
+        return frozenset(t.lower() for t in self.target_titles)
+
+    @cached_property
+    def locations_set(self) -> frozenset[str]:
+        return frozenset(t.lower() for t in self.target_locations)
+
+    @cached_property
+    def funding_stages_set(self) -> frozenset[str]:
+        return frozenset(t.lower() for t in self.target_funding_stages)
+
+    @cached_property
+    def industries_re(self) -> re.Pattern:
+        return compile_alternation(self.industries)
+
+    @cached_property
+    def titles_re(self) -> re.Pattern:
+        return compile_alternation(self.target_titles)
+
+    @cached_property
+    def locations_re(self) -> re.Pattern:
+        return compile_alternation(self.target_locations)
+
+    @cached_property
+    def technology_re(self) -> re.Pattern:
+        return compile_alternation(self.technology_signals)
+
+    @cached_property
+    def technology_names(self) -> dict[str, str]:
+        """Lowercased technology signal -> configured spelling."""
+        return {t.lower(): t for t in self.technology_signals}
+
 
-# Singleton instance used across all agents
-icp = ICPConfig()
\ No newline at end of file
+# Singleton instance used across all agents; the defaults above are trusted,
+# so skip validation at import time
+icp = ICPConfig.model_construct()
+assert sum(icp.scoring_weights) == 100, "Scoring weights must sum to 100"
\ No newline at end of file
@@ -1,9 +1,11 @@
 # orchestrator.py
+import asyncio
+import functools
+import heapq
+from operator import attrgetter
 from typing import TypedDict, Annotated
 from langgraph.graph import StateGraph, END
 from loguru import logger
-import sys, os
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from agents.discovery.discovery_agent import DiscoveryAgent, DiscoveredLead
 from agents.enrichment.enrichment_agent import EnrichmentAgent, EnrichedLead
@@ -19,27 +21,40 @@ class PipelineState(TypedDict):
     run_summary: dict
 
 
+# --- Agents (created once per process and shared by every pipeline run) ---
+@functools.lru_cache(maxsize=1)
+def _discovery() -> DiscoveryAgent:
+    return DiscoveryAgent()
+
+
+@functools.lru_cache(maxsize=1)
+def _enrichment() -> EnrichmentAgent:
+    return EnrichmentAgent()
+
+
+@functools.lru_cache(maxsize=1)
+def _qualification() -> QualificationAgent:
+    return QualificationAgent()
+
+
 # --- Node Functions ---
-def discovery_node(state: PipelineState) -> PipelineState:
+async def discovery_node(state: PipelineState) -> PipelineState:
     logger.info("PIPELINE | Stage 1: Discovery")
-    agent = DiscoveryAgent()
-    leads = agent.search_multiple_domains(state["domains"])
+    leads = await _discovery().search_multiple_domains(state["domains"])
     logger.info(f"PIPELINE | Discovered {len(leads)} leads")
     return {**state, "discovered_leads": leads}
 
 
-def enrichment_node(state: PipelineState) -> PipelineState:
+async def enrichment_node(state: PipelineState) -> PipelineState:
     logger.info("PIPELINE | Stage 2: Enrichment")
-    agent = EnrichmentAgent()
-    enriched = agent.enrich_all(state["discovered_leads"])
+    enriched = await _enrichment().enrich_all(state["discovered_leads"])
     logger.info(f"PIPELINE | Enriched {len(enriched)} leads")
     return {**state, "enriched_leads": enriched}
 
 
 def qualification_node(state: PipelineState) -> PipelineState:
     logger.info("PIPELINE | Stage 3: Qualification")
-    agent = QualificationAgent()
-    qualified = agent.qualify_all(state["enriched_leads"])
+    qualified = _qualification().qualify_all(state["enriched_leads"])
     passed = [q for q in qualified if q.icp_match]
     logger.info(f"PIPELINE | Qualified {len(passed)}/{len(qualified)} leads")
     return {**state, "qualified_leads": qualified}
@@ -48,13 +63,17 @@ def qualification_node(state: PipelineState) -> PipelineState:
 def summary_node(state: PipelineState) -> PipelineState:
     logger.info("PIPELINE | Stage 4: Summary")
     qualified = state["qualified_leads"]
-    passed = [q for q in qualified if q.icp_match]
+    passed = sum(1 for q in qualified if q.icp_match)
+    # Partial selection instead of relying on (or paying for) a full sort
+    top = heapq.nlargest(
+        5, (q for q in qualified if q.icp_match), key=attrgetter("qualification_score")
+    )
 
     summary = {
         "total_discovered": len(state["discovered_leads"]),
         "total_enriched": len(state["enriched_leads"]),
-        "total_qualified": len(passed),
-        "qualification_rate": f"{round(len(passed) / len(qualified) * 100)}%" if qualified else "0%",
+        "total_qualified": passed,
+        "qualification_rate": f"{round(passed / len(qualified) * 100)}%" if qualified else "0%",
         "top_leads": [
             {
                 "name": q.contact_name,
@@ -63,7 +82,7 @@ def summary_node(state: PipelineState) -> PipelineState:
                 "email": q.contact_email,
                 "score": q.qualification_score,
             }
-            for q in passed[:5]
+            for q in top
         ]
     }
     return {**state, "run_summary": summary}
@@ -87,10 +106,16 @@ def build_pipeline() -> StateGraph:
     return graph.compile()
 
 
+@functools.lru_cache(maxsize=1)
+def _get_pipeline():
+    """Compile the graph once per process; the compiled graph is reusable."""
+    return build_pipeline()
+
+
 # --- API-callable wrapper ---
-def run_pipeline(domain: str) -> dict:
+async def run_pipeline(domain: str) -> dict:
     """Wrapper for the API to call the pipeline for a single domain."""
-    pipeline = build_pipeline()
+    pipeline = _get_pipeline()
 
     initial_state: PipelineState = {
         "domains": [domain],
@@ -100,7 +125,7 @@ def run_pipeline(domain: str) -> dict:
         "run_summary": {},
     }
 
-    final_state = pipeline.invoke(initial_state)
+    final_state = await pipeline.ainvoke(initial_state)
     summary = final_state["run_summary"]
 
     return {
@@ -122,7 +147,7 @@ if __name__ == "__main__":
     }
 
     logger.info("PIPELINE | Starting B2B Lead Generation Pipeline")
-    final_state = pipeline.invoke(initial_state)
+    final_state = asyncio.run(pipeline.ainvoke(initial_state))
 
     summary = final_state["run_summary"]
     print("\n" + "="*50)
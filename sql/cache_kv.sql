@@ -0,0 +1,9 @@
+-- Persistent cache for Hunter/Apollo responses (agents/cache.py).
+-- Enabled with PERSISTENT_CACHE=true.
+create table if not exists public.cache_kv (
+    key        text primary key,
+    value      jsonb not null,
+    expires_at timestamptz not null
+);
+
+create index if not exists cache_kv_expires_at_idx on public.cache_kv (expires_at);
@@ -0,0 +1,10 @@
+-- Indexes backing the leads queries in api.py.
+
+-- GET /leads: ORDER BY qualification_score DESC with optional min_score filter
+create index if not exists leads_qual_score_idx
+    on public.leads (qualification_score desc nulls last);
+
+-- ExportLayer.to_supabase: bulk upsert with on_conflict=contact_email.
+-- A plain unique index (NULLs stay distinct) so ON CONFLICT can infer it.
+create unique index if not exists leads_contact_email_uidx
+    on public.leads (contact_email);
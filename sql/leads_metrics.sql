@@ -0,0 +1,13 @@
+-- Aggregates for GET /metrics in a single round-trip (api.py).
+create or replace function public.leads_metrics()
+returns json
+language sql
+stable
+as $$
+    select json_build_object(
+        'total', count(*),
+        'qualified', count(*) filter (where qualification_score >= 60),
+        'with_email', count(*) filter (where contact_email is not null)
+    )
+    from public.leads
+$$;
@@ -0,0 +1,114 @@
+# tests/test_api.py
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+
+class _FakePipeline:
+    def __init__(self, redis: "_FakeRedis") -> None:
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self) -> "_FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+    def __getattr__(self, name: str):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    async def execute(self) -> None:
+        for name, args, kwargs in self.calls:
+            await getattr(self.redis, name)(*args, **kwargs)
+
+class _FakeRedis:
+    """Just the commands api.py uses, on plain dicts."""
+
+    def __init__(self) -> None:
+        self.data: dict = {}
+
+    def pipeline(self, transaction: bool = True) -> _FakePipeline:
+        return _FakePipeline(self)
+
+    async def set(self, key: str, value: str, ex=None, nx: bool = False) -> bool:
+        if nx and key in self.data:
+            return False
+        self.data[key] = value
+        return True
+
+    async def get(self, key: str):
+        return self.data.get(key)
+
+    async def delete(self, key: str) -> None:
+        self.data.pop(key, None)
+
+    async def hset(self, key: str, mapping: dict) -> None:
+        self.data.setdefault(key, {}).update({k: str(v) for k, v in mapping.items()})
+
+    async def hgetall(self, key: str) -> dict:
+        return dict(self.data.get(key, {}))
+
+    async def expire(self, key: str, seconds: int) -> None:
+        pass
+
+    async def sadd(self, key: str, member: str) -> None:
+        self.data.setdefault(key, set()).add(member)
+
+    async def srem(self, key: str, member: str) -> None:
+        self.data.get(key, set()).discard(member)
+
+@pytest.fixture
+def redis(monkeypatch) -> _FakeRedis:
+    fake = _FakeRedis()
+    monkeypatch.setattr(api, "redis_client", fake)
+
+    async def no_pipeline(job_id: str, domains: list[str]) -> None:
+        pass
+
+    monkeypatch.setattr(api, "run_pipeline_background", no_pipeline)
+    return fake
+
+def _run(client: TestClient, key: str):
+    return client.post("/pipeline/run", json={"domains": ["example.com"]}, headers={"Idempotency-Key": key})
+
+def test_idempotency_key_claims_and_replays(redis: _FakeRedis) -> None:
+    client = TestClient(api.app)
+
+    first = _run(client, "abc")
+    assert first.status_code == 200
+    job_id = first.json()["job_id"]
+    assert redis.data["idem:abc"] == job_id
+
+    replay = _run(client, "abc")
+    assert replay.status_code == 200
+    assert replay.json()["job_id"] == job_id
+    assert replay.json()["message"] == "Pipeline already started for this Idempotency-Key."
+
+    other = _run(client, "def")
+    assert other.json()["job_id"] != job_id
+
+def test_idempotency_key_in_progress_returns_409(redis: _FakeRedis) -> None:
+    # Claimed by another request whose job hasn't been written yet
+    redis.data["idem:abc"] = "pending-job"
+
+    response = _run(TestClient(api.app), "abc")
+    assert response.status_code == 409
+
+def test_idempotency_claim_released_when_job_creation_fails(redis: _FakeRedis, monkeypatch) -> None:
+    save_job = api.save_job
+
+    async def failing_save_job(job_id: str, **fields) -> None:
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(api, "save_job", failing_save_job)
+    client = TestClient(api.app, raise_server_exceptions=False)
+
+    assert _run(client, "abc").status_code == 500
+    assert "idem:abc" not in redis.data
+
+    # The client's retry with the same key starts the job
+    monkeypatch.setattr(api, "save_job", save_job)
+    retry = _run(client, "abc")
+    assert retry.status_code == 200
+    assert redis.data["idem:abc"] == retry.json()["job_id"]
@@ -0,0 +1,65 @@
+# tests/test_cache.py
+import asyncio
+
+from cachetools import TTLCache
+
+from agents import cache
+
+def _lookup(results: dict, calls: list):
+    @cache.cached_json(TTLCache(maxsize=10, ttl=60), key=lambda domain: domain, namespace="test")
+    async def lookup(domain: str):
+        calls.append(domain)
+        return results.get(domain)
+
+    return lookup
+
+def test_cached_json_hit_and_miss(monkeypatch) -> None:
+    monkeypatch.setattr(cache.settings, "persistent_cache", False)
+    monkeypatch.setitem(cache.stats, "hits", 0)
+    monkeypatch.setitem(cache.stats, "misses", 0)
+    calls = []
+    lookup = _lookup({"a.com": {"name": "A"}}, calls)
+
+    assert asyncio.run(lookup("a.com")) == {"name": "A"}
+    assert asyncio.run(lookup("a.com")) == {"name": "A"}
+    assert calls == ["a.com"]
+    assert cache.stats == {"hits": 1, "misses": 1}
+
+def test_cached_json_does_not_cache_none(monkeypatch) -> None:
+    monkeypatch.setattr(cache.settings, "persistent_cache", False)
+    calls = []
+    lookup = _lookup({}, calls)
+
+    assert asyncio.run(lookup("missing.com")) is None
+    assert asyncio.run(lookup("missing.com")) is None
+    assert calls == ["missing.com", "missing.com"]
+
+def test_cached_json_persistent_fallback(monkeypatch) -> None:
+    store = {"test:stored.com": {"name": "Stored"}}
+    monkeypatch.setattr(cache.settings, "persistent_cache", True)
+    monkeypatch.setattr(cache, "_kv_get", store.get)
+    monkeypatch.setattr(cache, "_kv_set", lambda key, value, ttl: store.__setitem__(key, value))
+    calls = []
+    lookup = _lookup({"new.com": {"name": "New"}}, calls)
+
+    # Served from the persistent store without calling the API
+    assert asyncio.run(lookup("stored.com")) == {"name": "Stored"}
+    # Misses both caches, calls the API and writes through
+    assert asyncio.run(lookup("new.com")) == {"name": "New"}
+    assert calls == ["new.com"]
+    assert store["test:new.com"] == {"name": "New"}
+
+def test_cached_json_survives_persistent_store_errors(monkeypatch) -> None:
+    def unavailable(*args):
+        raise ConnectionError("supabase down")
+
+    monkeypatch.setattr(cache.settings, "persistent_cache", True)
+    monkeypatch.setattr(cache, "_kv_get", unavailable)
+    monkeypatch.setattr(cache, "_kv_set", unavailable)
+    calls = []
+    lookup = _lookup({"a.com": {"name": "A"}}, calls)
+
+    assert asyncio.run(lookup("a.com")) == {"name": "A"}
+    # Still cached in memory
+    assert asyncio.run(lookup("a.com")) == {"name": "A"}
+    assert calls == ["a.com"]
@@ -0,0 +1,16 @@
+# tests/test_db.py
+from postgrest.utils import SyncClient
+
+from db import get_supabase
+
+def test_tuned_session_keeps_postgrest_client_type() -> None:
+    postgrest = get_supabase().postgrest
+    session = postgrest.session
+
+    assert isinstance(session, SyncClient)
+    assert session._transport._pool._max_connections == 40
+
+    # SyncPostgrestClient.aclose() calls session.aclose(), which plain httpx.Client lacks
+    postgrest.aclose()
+    assert session.is_closed
+    get_supabase.cache_clear()
@@ -0,0 +1,61 @@
+# tests/test_enrichment.py
+import asyncio
+
+from agents.discovery.discovery_agent import DiscoveredLead
+from agents.enrichment.enrichment_agent import EnrichmentAgent
+
+def _enrich(orgs: dict[str, dict]) -> list:
+    async def enrich_company(domain: str) -> dict:
+        return orgs[domain]
+
+    async def verify_emails_bulk(emails: list[str]) -> dict[str, bool]:
+        return {email: True for email in emails}
+
+    agent = EnrichmentAgent()
+    agent.enrich_company = enrich_company
+    agent.verify_emails_bulk = verify_emails_bulk
+
+    leads = [
+        DiscoveredLead(contact_name="Ann", contact_email="ann@good.com", company_domain="good.com"),
+        DiscoveredLead(contact_name="Bob", contact_email="bob@other.com", company_domain="other.com"),
+    ]
+    return asyncio.run(agent.enrich_all(leads))
+
+def test_null_technology_names_enriches_with_empty_stack() -> None:
+    enriched = _enrich({
+        "good.com": {"name": "Good", "industry": "software", "technology_names": ["HubSpot"]},
+        "other.com": {"name": "Other", "technology_names": None},
+    })
+
+    assert [lead.contact_name for lead in enriched] == ["Ann", "Bob"]
+    assert enriched[0].technology_stack == ["HubSpot"]
+    assert enriched[1].technology_stack == []
+    assert enriched[1].company_name == "Other"
+    assert all(lead.email_verified for lead in enriched)
+
+def test_malformed_org_skips_only_that_lead() -> None:
+    enriched = _enrich({
+        "good.com": {"name": "Good", "technology_names": ["HubSpot"]},
+        "other.com": {"name": "Other", "technology_names": 42},
+    })
+
+    assert [lead.contact_name for lead in enriched] == ["Ann"]
+
+def test_company_lookup_failure_keeps_leads() -> None:
+    async def enrich_company(domain: str) -> dict:
+        raise RuntimeError("Apollo unavailable")
+
+    async def verify_emails_bulk(emails: list[str]) -> dict[str, bool]:
+        return {email: False for email in emails}
+
+    agent = EnrichmentAgent()
+    agent.enrich_company = enrich_company
+    agent.verify_emails_bulk = verify_emails_bulk
+
+    lead = DiscoveredLead(contact_name="Ann", company_name="Good", company_domain="good.com")
+    enriched = asyncio.run(agent.enrich_all([lead]))
+
+    assert len(enriched) == 1
+    assert enriched[0].company_name == "Good"
+    assert enriched[0].industry is None
+    assert enriched[0].technology_stack == []
@@ -0,0 +1,92 @@
+# tests/test_export_layer.py
+import httpx
+from postgrest.exceptions import APIError
+
+from export_layer import _is_transient
+
+def _api_error(code) -> APIError:
+    return APIError({"message": "error", "code": code})
+
+def test_is_transient_http_status() -> None:
+    # postgrest reports the HTTP status as an int when the body isn't JSON
+    assert _is_transient(_api_error(429))
+    assert _is_transient(_api_error(502))
+    assert _is_transient(_api_error(503))
+    assert not _is_transient(_api_error(400))
+    assert not _is_transient(_api_error(404))
+
+def test_is_transient_sqlstate() -> None:
+    for code in ("08006", "40001", "40P01", "53300", "57014", "57P01"):
+        assert _is_transient(_api_error(code)), code
+    for code in ("23505", "23502", "22P02", "42703"):
+        assert not _is_transient(_api_error(code)), code
+
+def test_is_transient_postgrest_codes() -> None:
+    for code in ("PGRST000", "PGRST001", "PGRST002", "PGRST003"):
+        assert _is_transient(_api_error(code)), code
+    assert not _is_transient(_api_error("PGRST204"))
+
+def test_is_transient_network_errors() -> None:
+    assert _is_transient(httpx.ReadTimeout("timed out"))
+    assert _is_transient(httpx.ConnectError("refused"))
+    assert not _is_transient(ValueError("bad"))
+    assert not _is_transient(_api_error(None))
+
+class _FakeTable:
+    def __init__(self, client: "_FakeSupabase") -> None:
+        self.client = client
+
+    def upsert(self, records, on_conflict=None) -> "_FakeTable":
+        self.records = records if isinstance(records, list) else [records]
+        return self
+
+    def execute(self):
+        self.client.calls += 1
+        error = self.client.error_for(self.records)
+        if error:
+            raise error
+        return type("Response", (), {"data": self.records})()
+
+class _FakeSupabase:
+    def __init__(self, error_for) -> None:
+        self.error_for = error_for
+        self.calls = 0
+
+    def table(self, name: str) -> _FakeTable:
+        return _FakeTable(self)
+
+def _exporter(monkeypatch, tmp_path, error_for):
+    import export_layer
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(export_layer, "get_supabase", lambda: _FakeSupabase(error_for))
+    # No backoff between retries in tests
+    monkeypatch.setattr(export_layer.ExportLayer._upsert.retry, "wait", lambda state: 0)
+    return export_layer.ExportLayer()
+
+def _leads(n: int):
+    from agents.qualification.qualification_agent import QualifiedLead
+    return [QualifiedLead(contact_name=f"Lead {i}", contact_email=f"lead{i}@example.com") for i in range(n)]
+
+def test_poisoned_chunk_falls_back_to_per_row(monkeypatch, tmp_path) -> None:
+    def error_for(records):
+        if any(r["contact_name"] == "Lead 2" for r in records):
+            return _api_error("23502")
+    exporter = _exporter(monkeypatch, tmp_path, error_for)
+
+    assert exporter.to_supabase(_leads(5), []) == 4
+    # One rejected batch, then one upsert per row
+    assert exporter.supabase.calls == 1 + 5
+
+def test_unavailable_database_skips_chunk(monkeypatch, tmp_path) -> None:
+    exporter = _exporter(monkeypatch, tmp_path, lambda records: _api_error("PGRST002"))
+    exporter.UPSERT_CHUNK_SIZE = 3
+
+    assert exporter.to_supabase(_leads(5), []) == 0
+    # Each of the two chunks is retried, never replayed row by row
+    assert exporter.supabase.calls == 2 * 5
+
+def test_request_error_skips_chunk(monkeypatch, tmp_path) -> None:
+    exporter = _exporter(monkeypatch, tmp_path, lambda records: _api_error("PGRST204"))
+
+    assert exporter.to_supabase(_leads(5), []) == 0
+    assert exporter.supabase.calls == 1
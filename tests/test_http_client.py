@@ -0,0 +1,77 @@
+# tests/test_http_client.py
+import asyncio
+
+import httpx
+import tenacity
+
+from agents import http_client
+
+def test_throttle_and_client_work_across_event_loops() -> None:
+    async def worker() -> None:
+        async with http_client.throttle("openai"):
+            await asyncio.sleep(0)
+
+    async def run() -> object:
+        # More workers than semaphore slots, so some have to wait on it
+        await asyncio.gather(*(worker() for _ in range(40)))
+        client = http_client.get_client()
+        await http_client.close_client()
+        return client
+
+    first = asyncio.run(run())
+    second = asyncio.run(run())
+    assert first is not second
+
+def _call_with_retry(responses: list[int], headers: dict | None = None) -> tuple[int, int]:
+    """Serve `responses` in order through api_retry; return (final status, requests made)."""
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        status = responses[min(calls, len(responses) - 1)]
+        calls += 1
+        return httpx.Response(status, headers=headers if status == 429 else None)
+
+    @http_client.api_retry
+    async def fetch(client: httpx.AsyncClient) -> int:
+        response = await client.get("https://api.example.com/")
+        await http_client.check_rate_limit(response)
+        response.raise_for_status()
+        return response.status_code
+
+    fetch.retry.wait = tenacity.wait_none()
+
+    async def run() -> int:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await fetch(client)
+
+    try:
+        status = asyncio.run(run())
+    except httpx.HTTPStatusError as e:
+        status = e.response.status_code
+    return status, calls
+
+def test_api_retry_honours_retry_after_on_429(monkeypatch) -> None:
+    delays = []
+
+    async def sleep(delay: float) -> None:
+        delays.append(delay)
+
+    monkeypatch.setattr(http_client.asyncio, "sleep", sleep)
+
+    assert _call_with_retry([429, 200], {"Retry-After": "2"}) == (200, 2)
+    assert 2.0 in delays
+
+    # A huge Retry-After is capped
+    delays.clear()
+    assert _call_with_retry([429, 200], {"Retry-After": "3600"}) == (200, 2)
+    assert http_client.MAX_RETRY_AFTER in delays
+
+def test_api_retry_retries_server_errors() -> None:
+    assert _call_with_retry([503, 502, 200]) == (200, 3)
+    # Gives up after five attempts and re-raises the last error
+    assert _call_with_retry([500]) == (500, 5)
+
+def test_api_retry_does_not_retry_client_errors() -> None:
+    for status in (400, 401, 404):
+        assert _call_with_retry([status, 200]) == (status, 1)
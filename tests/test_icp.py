@@ -1,18 +1,22 @@
 # tests/test_icp.py
-import sys, os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from icp_config import icp
 
 def test_icp() -> None:
-    assert sum(icp.scoring_weights.values()) == 100, "Scoring weights must sum to 100"
+    assert sum(icp.scoring_weights) == 100, "Scoring weights must sum to 100"
     assert icp.min_qualification_score > 0
     print("ICP Config loaded successfully:")
     print(f"  Industries: {icp.industries}")
     print(f"  Company size: {icp.min_employees} - {icp.max_employees} employees")
     print(f"  Target titles: {icp.target_titles}")
     print(f"  Min score to qualify: {icp.min_qualification_score}/100")
-    print(f"  Scoring weights sum: {sum(icp.scoring_weights.values())}")
+    print(f"  Scoring weights sum: {sum(icp.scoring_weights)}")
+
+def test_icp_lookups() -> None:
+    assert icp.titles_set == {t.lower() for t in icp.target_titles}
+    assert icp.titles_re.search("vp of sales, emea")
+    assert not icp.titles_re.search("software engineer")
+    assert icp.technology_names["hubspot"] == "HubSpot"
 
 if __name__ == "__main__":
     test_icp()
\ No newline at end of file